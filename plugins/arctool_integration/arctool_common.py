@@ -0,0 +1,83 @@
+# This Mod Organizer plugin is released to the pubic under the terms of the
+# GNU GPL version 3, which is accessible from the Free Software Foundation
+# here: https://www.gnu.org/licenses/gpl-3.0-standalone.html
+
+""" helpers shared by ARC Extract and ARC Merge """
+
+import os
+import shutil
+import subprocess
+
+
+class ARCtoolInvalidPathException(Exception):
+    """Thrown if ARCtool.exe path can't be found"""
+
+
+class ARCtoolMissingException(Exception):
+    """Thrown if selected ARC tool can't be found"""
+
+
+def walk_relative(path, relative_path="", ignored_folders=()):
+    """Like os.walk, but yields (relative dirpath, dirpath, folder names, file DirEntries)
+    with the path relative to the first call. ignored_folders are not entered"""
+    folder_list = []
+    file_list = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in ignored_folders:
+                        folder_list.append(entry.name)
+                else:
+                    # keep the entry, its stat is free on Windows
+                    file_list.append(entry)
+    except OSError:
+        return
+    yield relative_path, path, folder_list, file_list
+    for folder in folder_list:
+        yield from walk_relative(
+            os.path.join(path, folder), os.path.join(relative_path, folder), ignored_folders)
+
+
+def remove_file(path):
+    """Remove path if it exists"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def stage_file(source, destination, link=True):
+    """Hard link source to destination, copy it if linking isn't possible or link is False.
+    An existing destination is removed first, so it's never written through.
+    A missing source raises FileNotFoundError and leaves the destination alone"""
+    os.stat(source)
+    remove_file(destination)
+    if link:
+        try:
+            # staged files are only read and then deleted, a link is as good as a copy
+            os.link(source, destination)
+            return
+        except OSError:
+            pass
+    # copyfile uses sendfile on Linux and a 1 MiB buffer on Windows
+    shutil.copyfile(source, destination)
+
+
+# ARCtool is a console program, don't flash a console window for every run (Windows only)
+CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+
+def run_arctool(executable, args, target_path, capture=True):
+    """Run ARCtool on target_path without a shell and return its output.
+    Without capture the output is discarded and an empty string returned"""
+    if not capture:
+        subprocess.run(
+            [executable, *args, target_path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            creationflags=CREATE_NO_WINDOW, check=False)
+        return ""
+    # keep ARCtool's errors in the log next to its output, and never fail on odd characters
+    return subprocess.run(
+        [executable, *args, target_path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, errors="replace", creationflags=CREATE_NO_WINDOW, check=False
+    ).stdout
@@ -6,47 +6,201 @@
 
 import os
 import json
-import filecmp
+import hashlib
 import logging
-import pathlib
+import mmap
 import shutil
-from collections import defaultdict
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 
-from PyQt6.QtCore import (QThreadPool, QRunnable, QObject, pyqtSignal, pyqtSlot, qInfo)
-from PyQt6.QtGui import QIcon, QFileSystemModel
+from PyQt6.QtCore import (QThread, QThreadPool, QRunnable, QObject, pyqtSignal, pyqtSlot)
+from PyQt6.QtGui import QIcon
 from PyQt6.QtWidgets import ( QApplication, QMessageBox, QProgressDialog)
 
 import mobase
 
+from .arctool_common import (
+    ARCtoolInvalidPathException, ARCtoolMissingException, remove_file, run_arctool, stage_file, walk_relative)
 
-class ARCtoolInvalidPathException(Exception):
-    """Thrown if ARCtool.exe path can't be found"""
+try:
+    # much faster than hashlib, MO2 doesn't ship it so it's optional
+    import xxhash
+except ImportError:
+    xxhash = None
 
+# saved with the vanilla index so digests from the other hash are never compared
+HASH_NAME = "xxh3_64" if xxhash is not None else "blake2b"
 
-class ARCtoolMissingException(Exception):
-    """Thrown if selected ARC tool can't be found"""
+# ARCtool extract args, the default is for dragon's dogma dark arisen
+EXTRACT_ARGS = ("-x", "-pc", "-dd", "-texRE6", "-silent", "-alwayscomp", "-txt", "-v", "7")
+GAME_EXTRACT_ARGS = {
+    "residentevilbiohazardhdremaster": ("-x", "-pc", "--rehd", "-texRE6", "-silent", "-alwayscomp", "-txt", "-v", "7"),
+    "residentevil0biohazard0hdremaster": ("-x", "-pc", "---re0", "-texRE6", "-silent", "-alwayscomp", "-txt", "-v", "7"),
+}
+
+
+def remove_empty_folders(path):
+    """Remove empty sub folders of path, deepest first. Returns the removed folders"""
+    # list every folder once, parents before children, then try them in reverse
+    folder_list = []
+    pending = [path]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        folder_list.append(entry.path)
+                        pending.append(entry.path)
+        except OSError:
+            continue
+    folder_list.reverse()
+    return remove_folders_if_empty(folder_list)
+
+
+def list_files(path, relative_path="", folder_list=None):
+    """Return {normcased relative path: DirEntry} for every file below path.
+    Sub folders are appended to folder_list deepest first, if given"""
+    file_dict = {}
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                entry_relative_path = os.path.join(relative_path, os.path.normcase(entry.name))
+                if entry.is_dir(follow_symlinks=False):
+                    file_dict.update(list_files(entry.path, entry_relative_path, folder_list))
+                    if folder_list is not None:
+                        folder_list.append(entry.path)
+                else:
+                    file_dict[entry_relative_path] = entry
+    except OSError:
+        pass
+    return file_dict
+
+
+def remove_folders_if_empty(folder_list):
+    """Try to remove each folder in order, returns the removed folders"""
+    removed = []
+    for folder in folder_list:
+        # rmdir fails on non-empty folders, no need to list them first
+        try:
+            os.rmdir(folder)
+        except OSError:
+            continue
+        removed.append(folder)
+    return removed
+
+
+def open_sequential(path):
+    """Open path for unbuffered binary reading, hinting the OS that it's read front to back"""
+    # O_SEQUENTIAL and O_BINARY only exist on Windows
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0) | getattr(os, "O_SEQUENTIAL", 0))
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    return os.fdopen(fd, "rb", buffering=0)
+
+
+def files_equal(path_a, path_b):
+    """Compare two files of the same size in 1 MiB blocks, stopping at the first difference"""
+    with open_sequential(path_a) as file_a, open_sequential(path_b) as file_b:
+        # edited textures and models usually differ in their header already,
+        # probe one page before mapping the files
+        block_a = file_a.read(4096)
+        if block_a != file_b.read(4096):
+            return False
+        if len(block_a) < 4096:
+            return True
+        # most extracted files are small, finish those with one more read instead of mapping them
+        block_a = file_a.read(65536 - 4096)
+        if block_a != file_b.read(65536 - 4096):
+            return False
+        if len(block_a) < 65536 - 4096:
+            return True
+        # compare the rest straight from the page cache, no read() call per block
+        with mmap.mmap(file_a.fileno(), 0, access=mmap.ACCESS_READ) as map_a, \
+                mmap.mmap(file_b.fileno(), 0, access=mmap.ACCESS_READ) as map_b:
+            if len(map_a) != len(map_b):
+                return False
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                map_a.madvise(mmap.MADV_SEQUENTIAL)
+                map_b.madvise(mmap.MADV_SEQUENTIAL)
+            # bytes slices compare with memcmp, memoryview slices compare item by item
+            for offset in range(65536, len(map_a), 1 << 20):
+                if map_a[offset:offset + (1 << 20)] != map_b[offset:offset + (1 << 20)]:
+                    return False
+            return True
+
+
+def files_equal_or_false(path_a, path_b):
+    """files_equal, but an unreadable file is never equal"""
+    try:
+        return files_equal(path_a, path_b)
+    except OSError:
+        return False
+
+
+def hash_file(path):
+    """Return the XXH3 (or BLAKE2b without xxhash) digest of a file as an int, read in 1 MiB blocks"""
+    if xxhash is not None:
+        digest = xxhash.xxh3_64()
+    else:
+        digest = hashlib.blake2b(digest_size=16)
+    buffer = bytearray(1 << 20)
+    view = memoryview(buffer)
+    with open_sequential(path) as file_handle:
+        while size := file_handle.readinto(buffer):
+            digest.update(view[:size])
+    if xxhash is not None:
+        return digest.intdigest()
+    return int.from_bytes(digest.digest(), "big")
+
+
+def hash_file_or_none(path):
+    """hash_file, but None for an unreadable file"""
+    try:
+        return hash_file(path)
+    except OSError:
+        return None
+
+
+def remove_file_or_false(path):
+    """Remove path, False if it couldn't be removed"""
+    try:
+        os.remove(path)
+    except OSError:
+        return False
+    return True
 
 
 class ARCExtract(mobase.IPluginTool):
     arc_files_seen_dict = defaultdict(list)
     arc_files_duplicate_dict = defaultdict(list)
+    arc_files_fullpath_dict = defaultdict(dict)
     arc_folders_previous_build_dict = defaultdict(list)
+    arc_vanilla_extracted_set = set()
+    arc_vanilla_index_dict = {}
+    mod_active_list = []
+    threadCancel = False
 
     def __init__(self):
         super(ARCExtract, self).__init__()
         self._organizer = None
         self.threadpool = None
-        self.threadcancel = False
         self.current_index = 0
         self.extract_progress_dialog = None
         self.logger = None
         self.__parent_widget = None
         self.managed_game = None
+        self.game_directory = None
+        self.mod_directory = None
+        self.executable = None
+        # ARCtool runs, hashing and compares for every ExtractThreadWorker share this
+        # pool, so max-threads bounds them for the whole run
+        self.executor = None
+        self.log_enabled = False
 
     def init(self, organizer):
         self._organizer = organizer
         self.threadpool = QThreadPool()
-        self.threadcancel = False
         return True
 
     def name(self):
@@ -110,12 +264,25 @@ class ARCExtract(mobase.IPluginTool):
                 ),
                 True,
             ),
+            # every thread can run an ARCtool process or read files, a few at a time
+            # keeps the disk from thrashing on machines with many cores
             mobase.PluginSetting(
-                "max-threads", self.__tr("Maximum number of threads to allocate"), 2
+                "max-threads", self.__tr("Maximum number of threads to allocate"), min(4, QThread.idealThreadCount())
             ),
             mobase.PluginSetting(
                 "merge-mode", self.__tr("Extract everything and delete ITM"), False
             ),
+            mobase.PluginSetting(
+                "refresh-vanilla",
+                self.__tr("Extract vanilla ARC files again even if an up to date copy exists"),
+                False,
+            ),
+            mobase.PluginSetting(
+                "link-merge-files",
+                self.__tr("ARC Merge: hard link mod files into the merge folder instead of copying them."
+                          + " Faster, but ARCtool is then handed the mods' own files"),
+                False,
+            ),
         ]
 
     def displayName(self):
@@ -140,11 +307,15 @@ class ARCExtract(mobase.IPluginTool):
             self._organizer.setPluginSetting(self.name(), "verbose-log", False)
             self._organizer.setPluginSetting(self.name(), "uncheck-mods", True)
             self._organizer.setPluginSetting(
-                self.name(), "max-threads", self.threadpool.maxThreadCount()
+                self.name(), "max-threads", min(4, QThread.idealThreadCount())
             )
             self._organizer.setPluginSetting(self.name(), "merge-mode", False)
-        # set managed game
+            self._organizer.setPluginSetting(self.name(), "refresh-vanilla", False)
+            self._organizer.setPluginSetting(self.name(), "link-merge-files", False)
+        # set managed game and look up its folders once for all workers
         self.managed_game = self._organizer.managedGame().gameShortName()
+        self.game_directory = self._organizer.managedGame().dataDirectory().absolutePath()
+        self.mod_directory = self._organizer.modsPath()
         # locate arctool
         try:
             executable = self.get_arctool()
@@ -162,14 +333,18 @@ class ARCExtract(mobase.IPluginTool):
             )
             return
         # logger setup
-        if self._organizer.pluginSetting(self.name(), "log-enabled"):
-            log_file = self._organizer.overwritePath() + "\\ARCExtract.log"
+        self.log_enabled = bool(self._organizer.pluginSetting(self.name(), "log-enabled"))
+        if self.log_enabled:
+            log_file = os.path.join(self._organizer.overwritePath(), "ARCExtract.log")
             self.logger = logging.getLogger("ae_logger")
+            # a cancelled run never reaches the end, so drop its handler here
+            self.close_log()
             f_handler = logging.FileHandler(log_file, "w+")
             f_handler.setLevel(logging.DEBUG)
             f_format = logging.Formatter("%(asctime)s %(message)s")
             f_handler.setFormatter(f_format)
             self.logger.addHandler(f_handler)
+            self.logger.setLevel(logging.DEBUG)
             self.logger.propagate = False
             # start logging
             self.logger.debug("Detected game: " + self.managed_game)
@@ -200,6 +375,11 @@ class ARCExtract(mobase.IPluginTool):
     def __tr(self, txt: str) -> str:
         return QApplication.translate("ARCtool", txt)
 
+    def close_log(self):
+        for handler in self.logger.handlers[:]:
+            handler.close()
+            self.logger.removeHandler(handler)
+
     def show_activate_dialog(self, mod_name):
         msg = QMessageBox()
         msg.setIcon(QMessageBox.Icon.Warning)
@@ -222,10 +402,17 @@ class ARCExtract(mobase.IPluginTool):
         arctool_path = os.path.join(self._organizer.basePath(), "ARCtool.exe")
         if not os.path.isfile(arctool_path):
             raise ARCtoolMissingException
+        return arctool_path
 
     def process_mods(self, executable):  # called from display()
+        self.executable = executable
         self.arc_files_seen_dict.clear()
         self.arc_files_duplicate_dict.clear()
+        self.arc_files_fullpath_dict.clear()
+        self.arc_vanilla_extracted_set.clear()
+        # a cancelled run never reaches cleanup. its workers may still be submitting,
+        # so only drop the pool, its threads exit once the last worker lets go of it
+        self.executor = None
 
         # warn if merge mode active
         if bool(self._organizer.pluginSetting(self.name(), "merge-mode")):
@@ -244,13 +431,14 @@ class ARCExtract(mobase.IPluginTool):
             if retval == QMessageBox.StandardButton.No.value:
                 return
 
-        # get mod active list
+        # get mod active list, kept for the cleanup pass
         mod_active_list = []
         modlist = self._organizer.modList()
         for mod_name in modlist.allModsByProfilePriority():
             if modlist.state(mod_name) & mobase.ModState.ACTIVE:
                 if "Merged ARC" not in mod_name:
                     mod_active_list.append(mod_name)
+        ARCExtract.mod_active_list = mod_active_list
 
         # initialise progress dialog
         self.extract_progress_dialog = QProgressDialog(
@@ -270,7 +458,7 @@ class ARCExtract(mobase.IPluginTool):
         )
 
         # start single scan thread
-        worker = ScanThreadWorker(self._organizer, mod_active_list)
+        worker = ScanThreadWorker(self._organizer, self.game_directory, self.mod_directory, mod_active_list)
         worker.signals.progress.connect(self.scan_thread_worker_progress)
         worker.signals.result.connect(self.scan_thread_worker_output)
         worker.signals.finished.connect(self.scan_thread_worker_complete)
@@ -288,7 +476,7 @@ class ARCExtract(mobase.IPluginTool):
     def scan_thread_worker_complete(
         self,
     ):  # called after completion of ScanThreadWorker()
-        if bool(self._organizer.pluginSetting(self.name(), "log-enabled")):
+        if self.log_enabled:
             self.logger.debug("Scan complete")
             self.logger.debug(
                 "Duplicate ARC count: %s", len(self.arc_files_duplicate_dict)
@@ -304,7 +492,7 @@ class ARCExtract(mobase.IPluginTool):
                 "Nothing to do"))
 
     def scan_thread_worker_output(self, log_out):
-        if bool(self._organizer.pluginSetting(self.name(), "log-enabled")):
+        if self.log_enabled:
             self.logger.debug(log_out)
 
     def extract_duplicate_arcs(self):
@@ -313,39 +501,36 @@ class ARCExtract(mobase.IPluginTool):
         self.extract_progress_dialog.setMaximum(len(self.arc_files_duplicate_dict))
         self.extract_progress_dialog.setLabelText(self.__tr("Extracting..."))
         self.current_index = 0
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, int(self._organizer.pluginSetting(self.name(), "max-threads"))))
         # extract based on duplicates found
         for arc_file in self.arc_files_duplicate_dict:
             mod_list = self.arc_files_duplicate_dict[arc_file]
             # Pass the function to execute
-            worker = ExtractThreadWorker(self._organizer, self.managed_game, mod_list, arc_file)
+            worker = ExtractThreadWorker(
+                self._organizer, self.executable, self.managed_game, self.game_directory, self.mod_directory,
+                mod_list, arc_file, self.executor)
             worker.signals.result.connect(self.extract_thread_worker_output)
             worker.signals.finished.connect(self.extract_thread_worker_complete)
             # Execute
             self.threadpool.start(worker)
 
     def extract_thread_cleanup(self):  # called after completion of all ExtractThreadWorker()
-        organizer = self._organizer
-        mod_directory = organizer.modsPath()
-        # get mod active list
-        mod_active_list = []
-        modlist = organizer.modList()
-        if bool(organizer.pluginSetting(self.name(), "log-enabled")):
+        if self.log_enabled:
             self.logger.debug("Starting cleanup")
-        for mod_name in modlist.allModsByProfilePriority():
-            if modlist.state(mod_name) & mobase.ModState.ACTIVE:
-                if "Merged ARC" not in mod_name:
-                    mod_active_list.append(mod_name)
-        for mod_name in mod_active_list:
-            for dirpath, dirnames, filenames in os.walk(
-                f"{mod_directory}/{mod_name}", topdown=False
-            ):
-                for dirname in dirnames:
-                    full_path = os.path.join(dirpath, dirname)
-                    if not os.listdir(full_path):
-                        if bool(organizer.pluginSetting(self.name(), "verbose-log")):
-                            self.logger.debug("Deleting %s", full_path)
-                        os.rmdir(full_path)
-                        pathlib.Path(f"{full_path}.arc.txt").unlink(missing_ok=True)
+        # every worker is done, nothing is left queued on the shared pool
+        self.executor.shutdown(wait=False)
+        self.executor = None
+        # remove empty folders off the UI thread, the active mods were listed by process_mods
+        worker = CleanupThreadWorker(self._organizer, self.mod_directory, ARCExtract.mod_active_list)
+        worker.signals.result.connect(self.extract_thread_worker_output)
+        worker.signals.finished.connect(self.cleanup_thread_worker_complete)
+        # Execute
+        self.threadpool.start(worker)
+
+    def cleanup_thread_worker_complete(
+        self,
+    ):  # called after completion of CleanupThreadWorker()
         # announce completion
         self.extract_progress_dialog.hide()
         QMessageBox.information(
@@ -353,16 +538,16 @@ class ARCExtract(mobase.IPluginTool):
                 "Duplicate ARC count: %s\n" % len(self.arc_files_duplicate_dict)
                 + "Unique ARC count: %s" % len(self.arc_files_seen_dict))
         )
-        if bool(self._organizer.pluginSetting(self.name(), "log-enabled")):
+        if self.log_enabled:
             self.logger.debug("Extraction complete")
             # clear handlers. We're done
-            self.logger.handlers.clear()
+            self.close_log()
 
     def extract_thread_worker_complete(
         self,
     ):  # called after completion of each extractThreadWorker()
         self.current_index += 1
-        if bool(self._organizer.pluginSetting(self.name(), "log-enabled")):
+        if self.log_enabled:
             self.logger.debug(
                 "Extract index: %s : %s",
                 self.current_index,
@@ -376,7 +561,7 @@ class ARCExtract(mobase.IPluginTool):
             self.extract_progress_dialog.setValue(self.current_index)
 
     def extract_thread_worker_output(self, log_out):
-        if bool(self._organizer.pluginSetting(self.name(), "log-enabled")):
+        if self.log_enabled:
             self.logger.debug(log_out)
 
 
@@ -387,29 +572,35 @@ class ScanThreadWorkerSignals(QObject):
 
 
 class ScanThreadWorker(QRunnable):
-    def __init__(self, organizer, mod_active_list):
+    # folders that never hold game data
+    IGNORED_FOLDERS = (".git", "__MACOSX")
+
+    def __init__(self, organizer, game_directory, mod_directory, mod_active_list):
         self._organizer = organizer
+        self._game_directory = game_directory
+        self._mod_directory = mod_directory
         self._mod_active_list = mod_active_list
         self.signals = ScanThreadWorkerSignals()
         super(ScanThreadWorker, self).__init__()
 
     @pyqtSlot()
     def run(self):
-        game_directory = self._organizer.managedGame().dataDirectory().absolutePath()
+        # read settings once rather than for every mod and folder
+        plugin_name = ARCExtract.name(ARCExtract)
+        log_enabled = bool(self._organizer.pluginSetting(plugin_name, "log-enabled"))
+        verbose_log = bool(self._organizer.pluginSetting(plugin_name, "verbose-log"))
+        merge_mode = bool(self._organizer.pluginSetting(plugin_name, "merge-mode"))
+        max_threads = max(1, int(self._organizer.pluginSetting(plugin_name, "max-threads")))
+        game_directory = self._game_directory
         log_out = "\n"
-        mod_directory = self._organizer.modsPath()
+        mod_directory = self._mod_directory
         merge_mod = "Merged ARC - " + self._organizer.profileName()
         previous_merge_file = os.path.join(
             mod_directory, merge_mod, "arcFileMerge.json"
         )
 
         # create merge folder if not exist
-        pathlib.Path(
-            os.path.join(
-                mod_directory,
-                merge_mod,
-            )
-        ).mkdir(parents=True, exist_ok=True)
+        os.makedirs(os.path.join(mod_directory, merge_mod), exist_ok=True)
 
         # load previous arc merge info
         if os.path.isfile(previous_merge_file):
@@ -421,75 +612,81 @@ class ScanThreadWorker(QRunnable):
                 ) as file_handle:
                     ARCExtract.arc_folders_previous_build_dict = json.load(file_handle)
             except IOError:
-                if bool(self._organizer.pluginSetting(self._name(), "log-enabled")):
+                if log_enabled:
                     log_out += "arcFileMerge.json not found or invalid"
 
+        # load vanilla file sizes and digests saved by previous runs
+        vanilla_index_file = os.path.join(mod_directory, merge_mod, "arcVanillaIndex.json")
+        if os.path.isfile(vanilla_index_file):
+            try:
+                with open(vanilla_index_file, "r", encoding="utf-8") as file_handle:
+                    ARCExtract.arc_vanilla_index_dict = json.load(file_handle)
+            except (IOError, ValueError):
+                if log_enabled:
+                    log_out += "arcVanillaIndex.json invalid, vanilla ARCs will be indexed again"
+
+        # index vanilla ARC files once instead of stat'ing the game folder for
+        # every folder found in every mod
+        vanilla_arc_set = set()
+        for relative_dirpath, dirpath, dirnames, file_entries in walk_relative(game_directory):
+            for file_entry in file_entries:
+                if file_entry.name.endswith(".arc"):
+                    vanilla_arc_set.add(os.path.normcase(os.path.join(relative_dirpath, file_entry.name)))
+
+        # mods often ship the same game paths, stat each game file only once per scan
+        game_stat_cache = {}
+        # same size mod and game files found to differ by earlier scans, keyed by mod file
+        # path. only the pairs seen again are saved, so removed files drop out
+        game_compare_file = os.path.join(mod_directory, merge_mod, "arcGameCompare.json")
+        game_compare_dict = {}
+        game_compare_next_dict = {}
+        if merge_mode and os.path.isfile(game_compare_file):
+            try:
+                with open(game_compare_file, "r", encoding="utf-8") as file_handle:
+                    game_compare_dict = json.load(file_handle)
+            except (IOError, ValueError):
+                if log_enabled:
+                    log_out += "arcGameCompare.json invalid, game files will be compared again\n"
         mods_scanned = 0
+        next_progress_time = time.monotonic()
         # build list of active mod duplicate arc files to extract
-        for mod_name in self._mod_active_list:
+        for mod_name, mod_tree in self.list_mod_trees(mod_directory, max_threads):
             if ARCExtract.threadCancel:
                 return
             log_out += f"Scanning: {mod_name}\n"
-            # if merge mode, compare game directory files and remove duplicates here
-            if bool(self._organizer.pluginSetting("ARC Extract", "merge-mode")):
-                log_out += "Merge mod creation enabled\n"
-
-                def list_identical_files(dcmp):
-                    filelist = []
-                    for name in dcmp.same_files:
-                        filelist.append(os.path.join(dcmp.right, name))
-                    for sub_dcmp in dcmp.subdirs.values():
-                        for name in list_identical_files(sub_dcmp):
-                            filelist.append(name)
-                    return filelist
-
-                dcmp = filecmp.dircmp(game_directory, os.path.join(mod_directory, mod_name),)
-                files_to_delete = list_identical_files(dcmp)
-                if bool(self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "verbose-log")):
-                    log_out += "------ deleting files matching game folder ------\n"
-                    for name in files_to_delete:
-                        log_out += f'Removing "{name}"\n'
-                    log_out += "------ end output ------\n"
-                if bool(
-                    self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "log-enabled")):
-                    log_out += f"Removed {len(files_to_delete)} identical to game folder files\n"
-                for name in files_to_delete:
-                    os.remove(name)
-            for dirpath, dirnames, filenames in os.walk(os.path.join(mod_directory, mod_name)):
+            # one walk per mod finds the ARCs and, in merge mode, the copies of game files.
+            # the scan log is kept apart so the removals are still logged first
+            scan_log = ""
+            files_to_delete = []
+            # paths come back relative to the mod folder, no relpath needed
+            for relative_dirpath, dirpath, dirnames, file_entries in mod_tree:
                 # check for extracted arc folders
                 for folder in dirnames:
-                    full_path = os.path.join(dirpath, folder + ".arc")
-                    relative_path = os.path.relpath(full_path, mod_directory).split(os.path.sep, 1)[1]
-                    if os.path.isfile(os.path.normpath(game_directory + os.path.sep + relative_path)):
-                        if bool(self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "verbose-log")):
-                            log_out += f"ARC Folder: {full_path}\n"
-                        if bool(self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "merge-mode")):
-                            ARCExtract.arc_files_seen_dict[relative_path].append(mod_name)
-                        if (relative_path in ARCExtract.arc_files_seen_dict):
-                            mod_where_first_seen = ARCExtract.arc_files_seen_dict[relative_path][0]
-                            ARCExtract.arc_files_duplicate_dict[relative_path].append(mod_where_first_seen)
-                            if (mod_name not in ARCExtract.arc_files_duplicate_dict[relative_path]):
-                                ARCExtract.arc_files_duplicate_dict[relative_path].append(mod_name)
-                        else:
-                            if (mod_name not in ARCExtract.arc_files_seen_dict[relative_path]):
-                                ARCExtract.arc_files_seen_dict[relative_path].append(mod_name)
-                # check for arc files
-                for file in filenames:
-                    if file.endswith(".arc"):
-                        full_path = os.path.join(dirpath, file)
-                        relative_path = os.path.relpath(full_path, mod_directory).split(os.path.sep, 1)[1]
-                        if bool(self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "merge-mode")):
-                            if (mod_name not in ARCExtract.arc_files_seen_dict[relative_path]):
-                                ARCExtract.arc_files_seen_dict[relative_path].append(mod_name)
-                        if (relative_path in ARCExtract.arc_files_seen_dict):
-                            mod_where_first_seen = ARCExtract.arc_files_seen_dict[relative_path][0]
-                            ARCExtract.arc_files_duplicate_dict[relative_path].append(mod_where_first_seen)
-                            log_out += f"Duplicate ARC: {os.path.join(dirpath, file)}\n"
-                            if (mod_name not in ARCExtract.arc_files_duplicate_dict[relative_path]):
-                                ARCExtract.arc_files_duplicate_dict[relative_path].append(mod_name)
+                    # the full path is only needed for the log, build it when it's written
+                    relative_path = os.path.join(relative_dirpath, folder + ".arc")
+                    if os.path.normcase(relative_path) in vanilla_arc_set:
+                        if verbose_log:
+                            scan_log += f"ARC Folder: {os.path.join(dirpath, folder)}.arc\n"
+                        self.record_arc(relative_path, mod_name, merge_mode)
+                for file_entry in file_entries:
+                    # if merge mode, remove files identical to the game directory ones. only
+                    # the mod is walked, the game folder is far bigger and never needs listing
+                    if merge_mode and self.is_game_file_copy(
+                            file_entry, os.path.join(game_directory, relative_dirpath, file_entry.name),
+                            game_stat_cache, game_compare_dict, game_compare_next_dict):
+                        files_to_delete.append(file_entry.path)
+                        continue
+                    # check for arc files
+                    if file_entry.name.endswith(".arc"):
+                        full_path = file_entry.path
+                        relative_path = os.path.join(relative_dirpath, file_entry.name)
+                        # keep the path so extraction doesn't need to look for it again
+                        ARCExtract.arc_files_fullpath_dict[relative_path][mod_name] = full_path
+                        if self.record_arc(relative_path, mod_name, merge_mode):
+                            scan_log += f"Duplicate ARC: {full_path}\n"
                             # update arc_folders_previous_build_dict
                             # strip .arc extension
-                            relative_folder_path = os.path.splitext(relative_path)[0]
+                            relative_folder_path = relative_path[:-4]
                             if (relative_folder_path in ARCExtract.arc_folders_previous_build_dict and mod_name in ARCExtract.arc_folders_previous_build_dict[relative_folder_path]):
                                 ARCExtract.arc_folders_previous_build_dict[relative_folder_path].remove(mod_name)
                                 # update arcFileMerge.json
@@ -497,17 +694,103 @@ class ScanThreadWorker(QRunnable):
                                     with open(os.path.join(mod_directory, merge_mod, "arcFileMerge.json",), "w", encoding="utf-8",) as file_handle:
                                         json.dump(ARCExtract.arc_folders_previous_build_dict, file_handle,)
                                 except IOError:
-                                    if bool(self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "log-enabled")):
-                                        log_out += ("arcFileMerge.json missing or invalid")
-                        else:
-                            if (mod_name not in ARCExtract.arc_files_seen_dict[relative_path]):
-                                ARCExtract.arc_files_seen_dict[relative_path].append(mod_name)
+                                    if log_enabled:
+                                        scan_log += ("arcFileMerge.json missing or invalid")
+            if merge_mode:
+                log_out += "Merge mod creation enabled\n"
+                if verbose_log:
+                    log_out += "------ deleting files matching game folder ------\n"
+                    log_out += "".join(f'Removing "{name}"\n' for name in files_to_delete)
+                    log_out += "------ end output ------\n"
+                if log_enabled:
+                    log_out += f"Removed {len(files_to_delete)} identical to game folder files\n"
+                for name in files_to_delete:
+                    os.remove(name)
+            log_out += scan_log
             mods_scanned += 1
-            self.signals.progress.emit(mods_scanned)  # update progress
+            # the progress dialog pumps the event loop on every update, so cap it at ~20Hz
+            now = time.monotonic()
+            if now >= next_progress_time or mods_scanned == len(self._mod_active_list):
+                self.signals.progress.emit(mods_scanned)  # update progress
+                next_progress_time = now + 0.05
+        if merge_mode:
+            try:
+                with open(game_compare_file, "w", encoding="utf-8") as file_handle:
+                    json.dump(game_compare_next_dict, file_handle)
+            except IOError:
+                if log_enabled:
+                    log_out += "arcGameCompare.json could not be saved\n"
         self.signals.result.emit(log_out)  # Return log
         self.signals.finished.emit()  # Done
         return
 
+    def list_mod_trees(self, mod_directory, max_threads):
+        """Yield (mod name, walk_relative listing) for the active mods in order. The next
+        mods are listed on a thread pool meanwhile, a few at a time to bound memory"""
+        with ThreadPoolExecutor(max_workers=max_threads) as executor:
+            pending = deque()
+            for mod_name in self._mod_active_list:
+                pending.append((mod_name, executor.submit(
+                    lambda path: list(walk_relative(path, ignored_folders=self.IGNORED_FOLDERS)),
+                    os.path.join(mod_directory, mod_name))))
+                if len(pending) > max_threads * 2:
+                    mod_name, future = pending.popleft()
+                    yield mod_name, future.result()
+            while pending:
+                mod_name, future = pending.popleft()
+                yield mod_name, future.result()
+
+    @staticmethod
+    def is_game_file_copy(file_entry, game_file, game_stat_cache, game_compare_dict, game_compare_next_dict):
+        """Return True if the mod file in file_entry is identical to game_file.
+        Game file stats are kept in game_stat_cache, None for paths that aren't game files.
+        Differing pairs are looked up in and recorded to the game compare dicts by size and mtime"""
+        if game_file not in game_stat_cache:
+            try:
+                game_stat_cache[game_file] = os.stat(game_file)
+            except OSError:
+                # not a game file
+                game_stat_cache[game_file] = None
+        game_stat = game_stat_cache[game_file]
+        if game_stat is None:
+            return False
+        try:
+            # rule out size changes first with the size scandir already returned
+            mod_stat = file_entry.stat()
+            if mod_stat.st_size != game_stat.st_size:
+                return False
+            # same size and mtime is taken as a copy without reading, as filecmp.cmp did
+            if mod_stat.st_mtime == game_stat.st_mtime:
+                return True
+            compare_stamp = [mod_stat.st_size, mod_stat.st_mtime_ns, game_stat.st_size, game_stat.st_mtime_ns]
+            if game_compare_dict.get(file_entry.path) == compare_stamp or not files_equal(game_file, file_entry.path):
+                # neither file changed since they were last found to differ, or they differ now
+                game_compare_next_dict[file_entry.path] = compare_stamp
+                return False
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def record_arc(relative_path, mod_name, merge_mode):
+        """Record that mod_name has relative_path as an .arc file or extracted folder.
+        Returns True if it's a duplicate that needs extracting"""
+        seen_list = ARCExtract.arc_files_seen_dict[relative_path]
+        # mods are scanned one after another, so a mod already in a list is always its
+        # last entry. checking that instead of searching keeps popular ARCs linear
+        # merge mode extracts everything, so even the first mod counts as a duplicate
+        if merge_mode and (not seen_list or seen_list[-1] != mod_name):
+            seen_list.append(mod_name)
+        if seen_list:
+            duplicate_list = ARCExtract.arc_files_duplicate_dict[relative_path]
+            if not duplicate_list:
+                duplicate_list.append(seen_list[0])
+            if duplicate_list[-1] != mod_name:
+                duplicate_list.append(mod_name)
+            return True
+        seen_list.append(mod_name)
+        return False
+
 
 class ExtractThreadWorkerSignals(QObject):
     finished = pyqtSignal()
@@ -515,11 +798,15 @@ class ExtractThreadWorkerSignals(QObject):
 
 
 class ExtractThreadWorker(QRunnable):
-    def __init__(self, organizer, managed_game, mod_list, arc_file):
+    def __init__(self, organizer, executable, managed_game, game_directory, mod_directory, mod_list, arc_file, executor):
         self._organizer = organizer
+        self._executable = executable
         self._managed_game = managed_game
+        self._game_directory = game_directory
+        self._mod_directory = mod_directory
         self._mod_list = mod_list
         self._arc_file = arc_file
+        self._executor = executor
         self.signals = ExtractThreadWorkerSignals()
         super(ExtractThreadWorker, self).__init__()
 
@@ -528,101 +815,227 @@ class ExtractThreadWorker(QRunnable):
         # check for cancellation
         if ARCExtract.threadCancel:
             return
-        # default args are for dragon's dogma dark arisen
-        args = "-x -pc -dd -texRE6 -silent -alwayscomp -txt -v 7"
-        # change args if needed 
-        match self._managed_game:
-            case "residentevilbiohazardhdremaster":
-                args = "-x -pc --rehd -texRE6 -silent -alwayscomp -txt -v 7"
-            case "residentevil0biohazard0hdremaster":
-                args = "-x -pc ---re0 -texRE6 -silent -alwayscomp -txt -v 7"
-        executable = os.path.join(self._organizer.basePath(), "ARCtool.exe")
-        arc_file_parent_relpath = os.path.dirname(self._arc_file)
-        extracted_arc_folder_relpath = os.path.splitext(self._arc_file)[0]
-        game_directory = self._organizer.managedGame().dataDirectory().absolutePath()
-        mod_directory = self._organizer.modsPath()
+        # read settings once rather than for every mod and file
+        plugin_name = ARCExtract.name(ARCExtract)
+        log_enabled = bool(self._organizer.pluginSetting(plugin_name, "log-enabled"))
+        verbose_log = bool(self._organizer.pluginSetting(plugin_name, "verbose-log"))
+        remove_itm = bool(self._organizer.pluginSetting(plugin_name, "remove-ITM"))
+        delete_arc = bool(self._organizer.pluginSetting(plugin_name, "delete-ARC"))
+        merge_mode = bool(self._organizer.pluginSetting(plugin_name, "merge-mode"))
+        refresh_vanilla = bool(self._organizer.pluginSetting(plugin_name, "refresh-vanilla"))
+        args = GAME_EXTRACT_ARGS.get(self._managed_game, EXTRACT_ARGS)
+        executable = self._executable
+        # the scan only records paths ending in .arc
+        extracted_arc_folder_relpath = self._arc_file[:-4]
+        game_directory = self._game_directory
+        mod_directory = self._mod_directory
         merge_mod = "Merged ARC - " + self._organizer.profileName()
         arc_file_fullpath = os.path.join(mod_directory, merge_mod, self._arc_file)
         log_out = "\n"
         # extract vanilla if needed
-        extracted_arc_folder_fullpath = os.path.join(
-            mod_directory, merge_mod, extracted_arc_folder_relpath
-        )
+        extracted_arc_folder_fullpath = arc_file_fullpath[:-4]
+        # a saved vanilla index is only valid for the same game ARC, ARCtool args and hash
+        game_arc_fullpath = os.path.join(game_directory, self._arc_file)
+        try:
+            game_arc_stat = os.stat(game_arc_fullpath)
+            vanilla_stamp = [game_arc_stat.st_size, game_arc_stat.st_mtime_ns, " ".join(args), HASH_NAME]
+        except OSError:
+            vanilla_stamp = None
+        # "files" holds the vanilla file sizes and digests, "extracted" is set while the merge
+        # mod's folder holds exactly this vanilla ARC. ARC Merge clears it before merging into it
+        vanilla_index = ARCExtract.arc_vanilla_index_dict.get(self._arc_file)
+        if refresh_vanilla or vanilla_index is None or vanilla_index["stamp"] != vanilla_stamp:
+            vanilla_index = {"stamp": vanilla_stamp, "files": None, "extracted": False}
+            ARCExtract.arc_vanilla_index_dict[self._arc_file] = vanilla_index
+        # mods with an extracted folder instead of an .arc file have no entry
+        arc_fullpath_dict = ARCExtract.arc_files_fullpath_dict.get(self._arc_file, {})
+        extract_list = [
+            (mod_name, arc_fullpath_dict[mod_name]) for mod_name in self._mod_list
+            if mod_name in arc_fullpath_dict]
+        # shared with the other ExtractThreadWorkers, see ARCExtract.executor
+        executor = self._executor
+        # ARCtool runs for different mods don't depend on each other, run them side by side.
+        # results come back in mod order, so each mod's ITM removal starts as soon as its
+        # own extraction is done while the later mods are still extracting
+        # when the vanilla ARC is known to be needed, queue its extraction ahead of the
+        # mods so it runs alongside them instead of after the first mod is done
+        vanilla_future = None
+        if extract_list and (not remove_itm or vanilla_index["files"] is None):
+            vanilla_future = executor.submit(
+                self.extract_vanilla, executable, args, arc_file_fullpath, vanilla_index, verbose_log)
+
+        def wait_for_vanilla():
+            """Wait for the queued vanilla extraction, or run it here if none was queued"""
+            nonlocal vanilla_future
+            if vanilla_future is None:
+                return self.extract_vanilla(executable, args, arc_file_fullpath, vanilla_index, verbose_log)
+            future, vanilla_future = vanilla_future, None
+            return future.result()
+
+        command_out_list = executor.map(
+            lambda arc_fullpath: run_arctool(executable, args, arc_fullpath, verbose_log),
+            [arc_fullpath for mod_name, arc_fullpath in extract_list])
+        for (mod_name, arc_fullpath), command_out in zip(extract_list, command_out_list):
+            log_out += f"Extracting: {mod_name} {self._arc_file}\n"
+            if verbose_log:
+                log_out += f'Extract command: "{executable}" {" ".join(args)} "{arc_fullpath}"\n'
+                log_out += "------ start arctool output ------\n"
+                log_out += command_out + "------ end arctool output ------\n"
+            # ITM removal extracts vanilla only when its index needs the files,
+            # otherwise it's extracted as the base for ARC Merge
+            if not remove_itm:
+                log_out += wait_for_vanilla()
+            # remove ITM
+            if remove_itm:
+                log_out += "Removing ITM\n"
+                # index the vanilla files once and reuse them for every mod and later runs
+                if vanilla_index["files"] is None:
+                    log_out += wait_for_vanilla()
+                    vanilla_file_dict = {
+                        relative_path: [entry.stat().st_size, None]
+                        for relative_path, entry in list_files(extracted_arc_folder_fullpath).items()}
+                    # a failed vanilla extract lists no files, don't save that for later runs
+                    if vanilla_index.get("extracted") or vanilla_index["stamp"] is None:
+                        vanilla_index["files"] = vanilla_file_dict
+                else:
+                    vanilla_file_dict = vanilla_index["files"]
+                # compare mod folder to extracted vanilla arc folder, the same scan
+                # gives the folders to prune afterwards
+                mod_folder_list = []
+                mod_file_dict = list_files(
+                    os.path.join(mod_directory, mod_name, extracted_arc_folder_relpath), folder_list=mod_folder_list)
+                # files of a different size can't match, only hash the rest
+                candidate_list = [
+                    (relative_path, entry.path) for relative_path, entry in mod_file_dict.items()
+                    if relative_path in vanilla_file_dict
+                    and entry.stat().st_size == vanilla_file_dict[relative_path][0]]
+                # vanilla files are hashed the first time a mod file could match them,
+                # which needs the extracted files if the index came from an earlier run
+                vanilla_hash_list = [
+                    relative_path for relative_path, path in candidate_list
+                    if vanilla_file_dict[relative_path][1] is None]
+                if vanilla_hash_list:
+                    log_out += wait_for_vanilla()
+                # hashing, comparing and removing go on the same pool as the ARCtool runs,
+                # queued behind this ARC's remaining mod extractions
+                # an unreadable file counts as not identical, it's kept
+                for relative_path, digest in zip(vanilla_hash_list, executor.map(
+                        hash_file_or_none,
+                        [os.path.join(extracted_arc_folder_fullpath, relative_path) for relative_path in vanilla_hash_list])):
+                    vanilla_file_dict[relative_path][1] = digest
+                if self._arc_file in ARCExtract.arc_vanilla_extracted_set:
+                    # the vanilla files are on disk, compare against them directly so
+                    # edited files are only read up to the first difference
+                    match_list = list(executor.map(
+                        lambda candidate: files_equal_or_false(
+                            os.path.join(extracted_arc_folder_fullpath, candidate[0]), candidate[1]),
+                        candidate_list))
+                else:
+                    match_list = list(executor.map(
+                        lambda candidate: vanilla_file_dict[candidate[0]][1] is not None
+                        and hash_file_or_none(candidate[1]) == vanilla_file_dict[candidate[0]][1],
+                        candidate_list))
+                files_to_delete = [
+                    path for (relative_path, path), is_match in zip(candidate_list, match_list) if is_match]
+                # each remove waits on the disk, overlap them. a locked file stays and isn't logged
+                files_to_delete = [
+                    path for path, is_removed in zip(files_to_delete, executor.map(remove_file_or_false, files_to_delete))
+                    if is_removed]
+                if verbose_log:
+                    log_out += "------ deleting files matching vanilla extracted arc folder ------\n"
+                    # join the per-file lines once, a big log stays one allocation
+                    log_out += "".join(f'Removing "{name}"\n' for name in files_to_delete)
+                    log_out += "------ end output ------\n"
+                if log_enabled:
+                    log_out += f"Removed {len(files_to_delete)} identical files\n"
+
+                # delete empty folders
+                removed_folder_list = remove_folders_if_empty(mod_folder_list)
+                for full_path in removed_folder_list:
+                    remove_file(f"{full_path}.arc.txt")
+                if verbose_log:
+                    log_out += "".join(f"Removed empty folder: {full_path}\n" for full_path in removed_folder_list)
+            # delete arc
+            if delete_arc:
+                log_out += f"Deleting {arc_fullpath}\n"
+                remove_file(arc_fullpath)
+            # remove .arc.txt
+            if not merge_mode:
+                remove_file(f"{arc_fullpath}.txt")
+            log_out += "ARC extract complete"
+        if log_out != "\n":
+            self.signals.result.emit(log_out)  # Return log
+        self.signals.finished.emit()  # Done
+        return
+
+    def extract_vanilla(self, executable, args, arc_file_fullpath, vanilla_index, verbose_log):
+        """Extract the vanilla ARC into the merge mod, once per run. Returns the log output"""
+        if self._arc_file in ARCExtract.arc_vanilla_extracted_set:
+            return ""
+        log_out = ""
+        extracted_arc_folder_fullpath = arc_file_fullpath[:-4]
+        if not os.path.isdir(extracted_arc_folder_fullpath):
+            log_out += f"Extracting vanilla ARC: {self._arc_file}\n"
+        elif vanilla_index.get("extracted"):
+            # run() resets the entry when the game ARC changed, so the folder
+            # still holds this exact vanilla ARC
+            ARCExtract.arc_vanilla_extracted_set.add(self._arc_file)
+            return f"Vanilla ARC already extracted: {self._arc_file}\n"
+        vanilla_index["extracted"] = False
+        # the stamp comes from stat'ing the game ARC in run(), no need to check for it again
+        if vanilla_index["stamp"] is not None:
+            # an unmarked folder may still hold files ARC Merge linked in
+            # from mods, ARCtool would write through those links. start from scratch
+            shutil.rmtree(extracted_arc_folder_fullpath, ignore_errors=True)
+            # ARCtool creates the extracted folder, only the copy target is needed
+            os.makedirs(os.path.dirname(arc_file_fullpath), exist_ok=True)
+            stage_file(os.path.join(self._game_directory, self._arc_file), arc_file_fullpath)
+            command_out = run_arctool(executable, args, arc_file_fullpath, verbose_log)
+            if verbose_log:
+                log_out += "------ start arctool output ------\n"
+                log_out += command_out + "------ end arctool output ------\n"
+            # remove .arc file
+            os.remove(arc_file_fullpath)
+            # ARCtool doesn't create the folder if it fails, extract again next run
+            if os.path.isdir(extracted_arc_folder_fullpath):
+                vanilla_index["extracted"] = True
+            else:
+                log_out += f"Vanilla ARC extract failed: {self._arc_file}\n"
+        ARCExtract.arc_vanilla_extracted_set.add(self._arc_file)
+        return log_out
+
+
+class CleanupThreadWorkerSignals(QObject):
+    finished = pyqtSignal()
+    result = pyqtSignal(str)
+
+
+class CleanupThreadWorker(QRunnable):
+    def __init__(self, organizer, mod_directory, mod_list):
+        self._organizer = organizer
+        self._mod_directory = mod_directory
+        self._mod_list = mod_list
+        self.signals = CleanupThreadWorkerSignals()
+        super(CleanupThreadWorker, self).__init__()
+
+    @pyqtSlot()
+    def run(self):
+        mod_directory = self._mod_directory
+        verbose_log = bool(self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "verbose-log"))
+        log_out = "\n"
+        # all extract workers are done, save the vanilla index for the next run
+        merge_mod = "Merged ARC - " + self._organizer.profileName()
+        try:
+            with open(os.path.join(mod_directory, merge_mod, "arcVanillaIndex.json"), "w", encoding="utf-8") as file_handle:
+                json.dump(ARCExtract.arc_vanilla_index_dict, file_handle)
+        except IOError:
+            log_out += "arcVanillaIndex.json could not be saved\n"
         for mod_name in self._mod_list:
-            arc_fullpath = os.path.join(mod_directory, mod_name, self._arc_file)
-            if os.path.isfile(arc_fullpath):
-                log_out += f"Extracting: {mod_name} {self._arc_file}\n"
-                # extract arc
-                command = f'"{executable}" {args} "{arc_fullpath}"'
-                if bool(self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "verbose-log")):
-                    log_out += "Extract command: " + command + "\n"
-                command_out = os.popen(command).read()
-                if bool(self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "verbose-log")):
-                    log_out += "------ start arctool output ------\n"
-                    log_out += command_out + "------ end arctool output ------\n"
-                if not os.path.isdir(extracted_arc_folder_fullpath):
-                    log_out += f"Extracting vanilla ARC: {self._arc_file}\n"
-                if os.path.isfile(os.path.join(game_directory, self._arc_file)):
-                    pathlib.Path(extracted_arc_folder_fullpath).mkdir(parents=True, exist_ok=True)
-                    shutil.copy(os.path.join(game_directory, self._arc_file),os.path.join(mod_directory, merge_mod, arc_file_parent_relpath),)
-                    command = f'"{executable}" {args} "{arc_file_fullpath}"'
-                    command_out = os.popen(command).read()
-                    if bool(self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "verbose-log")):
-                        log_out += "------ start arctool output ------\n"
-                        log_out += command_out + "------ end arctool output ------\n"
-                    # remove .arc file
-                    os.remove(arc_file_fullpath)
-                # remove ITM
-                if bool(self._organizer.pluginSetting("ARC Extract", "remove-ITM")):
-                    log_out += "Removing ITM\n"
-
-                    def list_identical_files(dcmp):
-                        filelist = []
-                        try:
-                            for name in dcmp.same_files:
-                                filelist.append(os.path.join(dcmp.right, name))
-                        except OSError as e:
-                            # do nothing
-                            error = e
-                        for sub_dcmp in dcmp.subdirs.values():
-                            for name in list_identical_files(sub_dcmp):
-                                filelist.append(name)
-                        return filelist
-
-                    # compare mod folder to extracted vanilla arc folder
-                    dcmp = filecmp.dircmp(os.path.join(mod_directory, merge_mod, extracted_arc_folder_relpath,), os.path.join(mod_directory, mod_name, extracted_arc_folder_relpath),)
-                    files_to_delete = list_identical_files(dcmp)
-                    if bool(self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "verbose-log")):
-                        log_out += "------ deleting files matching vanilla extracted arc folder ------\n"
-                        for name in files_to_delete:
-                            log_out += f'Removing "{name}"\n'
-                        log_out += "------ end output ------\n"
-                    if bool(
-                        self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "log-enabled")):
-                        log_out += f"Removed {len(files_to_delete)} identical files\n"
-                    for name in files_to_delete:
-                        os.remove(name)
-
-                    # delete empty folders
-                    for dirpath, dirnames, filenames in os.walk(
-                        os.path.join(mod_directory, mod_name, extracted_arc_folder_relpath), topdown=False,):
-                        for dirname in dirnames:
-                            full_path = os.path.join(dirpath, dirname)
-                            if not os.listdir(full_path):
-                                if bool(self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "verbose-log")):
-                                    log_out += f"Removed empty folder: {full_path}\n"
-                                os.rmdir(full_path)
-                                pathlib.Path(f"{full_path}.arc.txt").unlink(missing_ok=True)
-                # delete arc
-                if bool(
-                    self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "delete-ARC")):
-                    log_out += f"Deleting {arc_fullpath}\n"
-                    pathlib.Path(arc_fullpath).unlink(missing_ok=True)
-                # remove .arc.txt
-                if not bool(
-                    self._organizer.pluginSetting(ARCExtract.name(ARCExtract), "merge-mode")):
-                    pathlib.Path(f"{arc_fullpath}.txt").unlink(missing_ok=True)
-                log_out += "ARC extract complete"
+            removed_folder_list = remove_empty_folders(os.path.join(mod_directory, mod_name))
+            for full_path in removed_folder_list:
+                remove_file(f"{full_path}.arc.txt")
+            if verbose_log:
+                log_out += "".join(f"Deleting {full_path}\n" for full_path in removed_folder_list)
         if log_out != "\n":
             self.signals.result.emit(log_out)  # Return log
         self.signals.finished.emit()  # Done
@@ -8,26 +8,37 @@ import os
 import json
 import shutil
 import logging
-import pathlib
+import time
 from collections import defaultdict
 
 from PyQt6.QtCore import ( QThreadPool, QRunnable, QObject, pyqtSignal, pyqtSlot)
-from PyQt6.QtGui import QIcon, QFileSystemModel
+from PyQt6.QtGui import QIcon
 from PyQt6.QtWidgets import QApplication, QMessageBox, QProgressDialog
 
 import mobase
 
+from .arctool_common import (
+    ARCtoolInvalidPathException, ARCtoolMissingException, remove_file, run_arctool, stage_file, walk_relative)
 
-class ARCtoolInvalidPathException(Exception):
-    """Thrown if ARCtool.exe path can't be found"""
+# ARCtool args, the default is for dragon's dogma dark arisen
+COMPRESS_ARGS = ("-c", "-pc", "-dd", "-texRE6", "-silent", "-alwayscomp", "-tex", "-xfs", "-gmd", "-txt", "-v", "7")
+EXTRACT_ARGS = ("-x", "-pc", "-dd", "-texRE6", "-silent", "-alwayscomp", "-txt", "-v", "7")
+GAME_COMPRESS_ARGS = {
+    "residentevil0biohazard0hdremaster": ("-c", "-pc", "-re0", "-texRE6", "-silent", "-alwayscomp", "-tex", "-xfs", "-gmd", "-txt", "-v", "7"),
+    "residentevilbiohazardhdremaster": ("-c", "-pc", "-rehd", "-texRE6", "-silent", "-alwayscomp", "-tex", "-xfs", "-gmd", "-txt", "-v", "7"),
+}
+GAME_EXTRACT_ARGS = {
+    "residentevil0biohazard0hdremaster": ("-x", "-pc", "--re0", "-texRE6", "-silent", "-alwayscomp", "-txt", "-v", "7"),
+    "residentevilbiohazardhdremaster": ("-x", "-pc", "--rehd", "-texRE6", "-silent", "-alwayscomp", "-txt", "-v", "7"),
+}
 
 
-class ARCtoolMissingException(Exception):
-    """Thrown if selected ARC file can't be found"""
-
 class ARCMerge(mobase.IPluginTool):
     arc_folders_previous_build_dict = defaultdict(list)
     arc_folders_current_build_dict = defaultdict(list)
+    # per ARC folder and mod, the [size, mtime_ns] of every file the merge copies
+    arc_folders_previous_fingerprint_dict = {}
+    arc_folders_current_fingerprint_dict = defaultdict(dict)
     threadCancel = False
 
     def __init__(self):
@@ -35,10 +46,15 @@ class ARCMerge(mobase.IPluginTool):
         self._organizer = None
         self.threadpool = None
         self.current_index = 0
+        self.cleanup_pending = 0
         self.merge_progress_dialog = None
         self.logger = None
         self.__parent_widget = None
         self.managed_game = None
+        self.game_directory = None
+        self.mod_directory = None
+        self.executable = None
+        self.log_enabled = False
 
     def init(self, organizer):
         self._organizer = organizer
@@ -89,9 +105,12 @@ class ARCMerge(mobase.IPluginTool):
         )
         # set managed game
         self.managed_game = self._organizer.managedGame().gameShortName()
+        # resolve the directories once, the workers get them passed in
+        self.game_directory = self._organizer.managedGame().dataDirectory().absolutePath()
+        self.mod_directory = self._organizer.modsPath()
         # verify that ARCtool path is still valid
         try:
-            executable = self.get_arctool()
+            self.executable = self.get_arctool()
         except ARCtoolInvalidPathException:
             QMessageBox.critical(
                 self.__parent_widget,
@@ -107,14 +126,18 @@ class ARCMerge(mobase.IPluginTool):
             return
         
         # logger setup
-        if self._organizer.pluginSetting(self.main_tool_name(), "log-enabled"):
-            log_file = self._organizer.overwritePath() + "\\ARCMerge.log"
+        self.log_enabled = bool(self._organizer.pluginSetting(self.main_tool_name(), "log-enabled"))
+        if self.log_enabled:
+            log_file = os.path.join(self._organizer.overwritePath(), "ARCMerge.log")
             self.logger = logging.getLogger("am_logger")
+            # a cancelled run never reaches the end, so drop its handler here
+            self.close_log()
             f_handler = logging.FileHandler(log_file, "w+")
             f_handler.setLevel(logging.DEBUG)
             f_format = logging.Formatter("%(asctime)s %(message)s")
             f_handler.setFormatter(f_format)
             self.logger.addHandler(f_handler)
+            self.logger.setLevel(logging.DEBUG)
             self.logger.propagate = False
             # start logging
             self.logger.debug("Detected game: " + self.managed_game)
@@ -145,10 +168,16 @@ class ARCMerge(mobase.IPluginTool):
         arctool_path = os.path.join(self._organizer.basePath(), "ARCtool.exe")
         if not os.path.isfile(arctool_path):
             raise ARCtoolMissingException
+        return arctool_path
 
     def __tr(self, txt: str) -> str:
         return QApplication.translate("ARCMerge", txt)
 
+    def close_log(self):
+        for handler in self.logger.handlers[:]:
+            handler.close()
+            self.logger.removeHandler(handler)
+
     def show_activate_dialog(self, mod_name):
         msg = QMessageBox()
         msg.setIcon(QMessageBox.Icon.Warning)
@@ -166,6 +195,8 @@ class ARCMerge(mobase.IPluginTool):
     def __process_mods(self):  # called from display()
         self.arc_folders_previous_build_dict.clear()
         self.arc_folders_current_build_dict.clear()
+        self.arc_folders_previous_fingerprint_dict.clear()
+        self.arc_folders_current_fingerprint_dict.clear()
 
         # reset cancelled flag
         ARCMerge.threadCancel = False
@@ -184,7 +215,7 @@ class ARCMerge(mobase.IPluginTool):
         # set max thread count
         self.threadpool.setMaxThreadCount(self._organizer.pluginSetting(self.main_tool_name(), "max-threads"))
         # start single scan thread
-        worker = ScanThreadWorker(self._organizer, active_mod_list)
+        worker = ScanThreadWorker(self._organizer, self.game_directory, self.mod_directory, active_mod_list)
         worker.signals.progress.connect(self.scan_thread_worker_progress)
         worker.signals.result.connect(self.scan_thread_worker_output)
         worker.signals.finished.connect(self.scan_thread_worker_complete)
@@ -192,18 +223,22 @@ class ARCMerge(mobase.IPluginTool):
         self.threadpool.start(worker)
 
     def merge_arc_files(self):
-        merge_needed_count = 0
         # process changed merges from dictionary
-        for entry in self.arc_folders_current_build_dict:
-            if (entry not in self.arc_folders_previous_build_dict or self.arc_folders_current_build_dict[entry] != self.arc_folders_previous_build_dict[entry]):
-                # Pass the function to execute
-                worker = MergeThreadWorker(self._organizer, self.managed_game, self.arc_folders_current_build_dict[entry], entry)
-                worker.signals.result.connect(self.merge_thread_worker_output)
-                worker.signals.finished.connect(self.merge_thread_worker_complete)
-                # Execute
-                self.threadpool.start(worker)
-                merge_needed_count += 1
-        if bool(self._organizer.pluginSetting(self.main_tool_name(), "log-enabled")):
+        # the same mods can still have changed files, compare their fingerprints too
+        merge_entry_list = [
+            entry for entry in self.arc_folders_current_build_dict
+            if (entry not in self.arc_folders_previous_build_dict or self.arc_folders_current_build_dict[entry] != self.arc_folders_previous_build_dict[entry]
+                or self.arc_folders_current_fingerprint_dict[entry] != self.arc_folders_previous_fingerprint_dict.get(entry))]
+        self.unmark_vanilla_folders(merge_entry_list)
+        for entry in merge_entry_list:
+            # Pass the function to execute
+            worker = MergeThreadWorker(self._organizer, self.managed_game, self.executable, self.game_directory, self.mod_directory, self.arc_folders_current_build_dict[entry], entry)
+            worker.signals.result.connect(self.merge_thread_worker_output)
+            worker.signals.finished.connect(self.merge_thread_worker_complete)
+            # Execute
+            self.threadpool.start(worker)
+        merge_needed_count = len(merge_entry_list)
+        if self.log_enabled:
             self.logger.debug("ARC merge count: %s", merge_needed_count)
         # progress reinit
         self.merge_progress_dialog.setLabelText("Merging...")
@@ -214,33 +249,78 @@ class ARCMerge(mobase.IPluginTool):
         if merge_needed_count == 0:
             self.mod_cleanup()
 
+    def unmark_vanilla_folders(self, arc_folder_list):
+        """ARC Extract reuses extracted vanilla folders marked in arcVanillaIndex.json. The
+        merges below stop them being pure vanilla, so clear their marks before any starts"""
+        vanilla_index_file = os.path.join(self.mod_directory, "Merged ARC - " + self._organizer.profileName(), "arcVanillaIndex.json")
+        try:
+            with open(vanilla_index_file, "r", encoding="utf-8") as file_handle:
+                vanilla_index_dict = json.load(file_handle)
+        except (IOError, ValueError):
+            return
+        unmarked = False
+        for arc_folder in arc_folder_list:
+            vanilla_index = vanilla_index_dict.get(arc_folder + ".arc")
+            if vanilla_index is not None and vanilla_index.get("extracted"):
+                vanilla_index["extracted"] = False
+                unmarked = True
+        if unmarked:
+            try:
+                with open(vanilla_index_file, "w", encoding="utf-8") as file_handle:
+                    json.dump(vanilla_index_dict, file_handle)
+            except IOError:
+                if self.log_enabled:
+                    self.logger.debug("arcVanillaIndex.json could not be saved")
+
     def mod_cleanup(self):
-        mod_directory = self.__get_mod_directory()
-        merge_mod = "Merged ARC - " + self._organizer.profileName()
         self.merge_progress_dialog.setLabelText(self.__tr("Cleaning up..."))
 
-        if bool(self._organizer.pluginSetting(self.main_tool_name(), "log-enabled")):
+        if self.log_enabled:
             self.logger.debug("Cleaning up...")
         # remove stale .arc files from merged folder
+        self.cleanup_pending = 0
         for entry in self.arc_folders_previous_build_dict:
             if self.merge_progress_dialog.wasCanceled():
-                if bool(self._organizer.pluginSetting(self.main_tool_name(), "log-enabled")):
+                if self.log_enabled:
                     self.logger.debug("Merge cancelled")
+                # workers already started still finish, don't let them complete the merge.
+                # arcFileMerge.json keeps the stale arcs that weren't deleted
+                ARCMerge.threadCancel = True
                 return
             if entry not in self.arc_folders_current_build_dict:
-                if bool(self._organizer.pluginSetting(self.main_tool_name(), "log-enabled")):
+                if self.log_enabled:
                     self.logger.debug("Deleting stale arc: %s", entry)
                 # Pass the function to execute
-                worker = CleanupThreadWorker(self._organizer, entry)
+                worker = CleanupThreadWorker(self._organizer, self.mod_directory, entry)
+                worker.signals.finished.connect(self.cleanup_thread_worker_complete)
+                self.cleanup_pending += 1
                 # Execute
                 self.threadpool.start(worker)
+        # don't refresh MO2 until every stale arc is gone
+        if self.cleanup_pending == 0:
+            self.merge_complete()
+
+    def cleanup_thread_worker_complete(self):  # called after completion of each CleanupThreadWorker()
+        self.cleanup_pending -= 1
+        if self.cleanup_pending == 0 and not ARCMerge.threadCancel:
+            self.merge_complete()
+
+    def merge_complete(self):
+        mod_directory = self.mod_directory
+        merge_mod = "Merged ARC - " + self._organizer.profileName()
         # write arc merge info to json
         try:
             with open(os.path.join(mod_directory, merge_mod, "arcFileMerge.json"), "w", encoding="utf-8",) as file_handle:
                 json.dump(self.arc_folders_current_build_dict, file_handle)
         except IOError:
-            if bool(self._organizer.pluginSetting(self.main_tool_name(), "log-enabled")):
+            if self.log_enabled:
                 self.logger.debug("arcFileMerge.json not found or invalid")
+        try:
+            with open(os.path.join(mod_directory, merge_mod, "arcMergeFingerprint.json"), "w", encoding="utf-8",) as file_handle:
+                json.dump(self.arc_folders_current_fingerprint_dict, file_handle)
+        except IOError:
+            if self.log_enabled:
+                self.logger.debug("arcMergeFingerprint.json could not be saved")
 
         if self._organizer.pluginSetting(self.main_tool_name(), "uncheck-mods"):
             # disable all invalid mods
@@ -253,8 +333,8 @@ class ARCMerge(mobase.IPluginTool):
         QMessageBox.information(
             self.__parent_widget, self.__tr(""), self.__tr("Merge complete")
         )
-        if self._organizer.pluginSetting(self.name(), "log-enabled"):
-            self.logger.handlers.clear()
+        if self.log_enabled:
+            self.close_log()
         # enable merge mod
         self._organizer.modList().setActive(merge_mod, True)
         self._organizer.refresh()
@@ -270,7 +350,7 @@ class ARCMerge(mobase.IPluginTool):
     def scan_thread_worker_complete(
         self,
     ):  # called after completion of ScanThreadWorker()
-        if bool(self._organizer.pluginSetting(self.main_tool_name(), "log-enabled")):
+        if self.log_enabled:
             self.logger.debug("Scan complete")
             self.logger.debug("Previous count: %d", len(self.arc_folders_previous_build_dict))
             self.logger.debug("Current count: %s", len(self.arc_folders_current_build_dict))
@@ -278,12 +358,12 @@ class ARCMerge(mobase.IPluginTool):
         self.merge_arc_files()
 
     def scan_thread_worker_output(self, log_out):
-        if bool(self._organizer.pluginSetting(self.main_tool_name(), "log-enabled")):
+        if self.log_enabled:
             self.logger.debug(log_out)
 
     def merge_thread_worker_complete(self):
         self.current_index += 1
-        if bool(self._organizer.pluginSetting(self.main_tool_name(), "log-enabled")):
+        if self.log_enabled:
             self.logger.debug(
                 "Merge index: %s : %s",
                 self.current_index,
@@ -299,12 +379,9 @@ class ARCMerge(mobase.IPluginTool):
             self.merge_progress_dialog.setValue(self.current_index)
 
     def merge_thread_worker_output(self, log_out):
-        if bool(self._organizer.pluginSetting(self.main_tool_name(), "log-enabled")):
+        if self.log_enabled:
             self.logger.debug(log_out)
 
-    def __get_mod_directory(self):
-        return self._organizer.modsPath()
-
     @staticmethod
     def main_tool_name():
         return "ARC Extract"
@@ -317,8 +394,13 @@ class ScanThreadWorkerSignals(QObject):
 
 
 class ScanThreadWorker(QRunnable):
-    def __init__(self, organizer, active_mod_list):
+    # folders that never hold game data
+    IGNORED_FOLDERS = (".git", "__MACOSX")
+
+    def __init__(self, organizer, game_directory, mod_directory, active_mod_list):
         self._organizer = organizer
+        self.game_directory = game_directory
+        self.mod_directory = mod_directory
         self.active_mod_list = active_mod_list
         self.signals = ScanThreadWorkerSignals()
         super(ScanThreadWorker, self).__init__()
@@ -326,16 +408,18 @@ class ScanThreadWorker(QRunnable):
     @pyqtSlot()
     def run(self):
         log_out = "\n"
-        mod_directory = self._organizer.modsPath()
-        modlist = self._organizer.modList()
+        mod_directory = self.mod_directory
         merge_mod = "Merged ARC - " + self._organizer.profileName()
-        game_directory = self._organizer.managedGame().dataDirectory().absolutePath()
+        game_directory = self.game_directory
         previous_merge_file = os.path.join(
             mod_directory, merge_mod, "arcFileMerge.json"
         )
+        # read settings once, not for every folder scanned
+        log_enabled = bool(self._organizer.pluginSetting(ARCMerge.main_tool_name(), "log-enabled"))
+        verbose_log = bool(self._organizer.pluginSetting(ARCMerge.main_tool_name(), "verbose-log"))
 
         # create merge folder if not exist
-        pathlib.Path(os.path.join(mod_directory, merge_mod, )).mkdir(parents=True, exist_ok=True)
+        os.makedirs(os.path.join(mod_directory, merge_mod), exist_ok=True)
 
         # load previous arc merge info
         if os.path.isfile(previous_merge_file):
@@ -343,53 +427,106 @@ class ScanThreadWorker(QRunnable):
                 with open(previous_merge_file, "r", encoding="utf-8", ) as file_handle:
                     ARCMerge.arc_folders_previous_build_dict = json.load(file_handle)
             except IOError:
-                if bool(self._organizer.pluginSetting(ARCMerge.main_tool_name(), "log-enabled")):
+                if log_enabled:
                     log_out += "arcFileMerge.json missing or invalid"
+        # without fingerprints every ARC is merged again, as if its files had changed
+        previous_fingerprint_file = os.path.join(mod_directory, merge_mod, "arcMergeFingerprint.json")
+        if os.path.isfile(previous_fingerprint_file):
+            try:
+                with open(previous_fingerprint_file, "r", encoding="utf-8") as file_handle:
+                    ARCMerge.arc_folders_previous_fingerprint_dict = json.load(file_handle)
+            except (IOError, ValueError):
+                if log_enabled:
+                    log_out += "arcMergeFingerprint.json invalid, all ARCs will be merged\n"
 
         mods_scanned = 0
+        next_progress_time = time.monotonic()
+        # index the game ARCs once instead of stat'ing the game folder for every
+        # folder in every mod. stored without the .arc, as the folder path it extracts to
+        game_arc_set = frozenset(
+            os.path.normcase(os.path.join(relative_dirpath, file_entry.name[:-4]))
+            for relative_dirpath, dirpath, folder_list, file_list in walk_relative(game_directory)
+            for file_entry in file_list if file_entry.name.endswith(".arc"))
         # build list of current active mod arc folders to merge
         for mod_name in self.active_mod_list:
             # check for cancellation
             if ARCMerge.threadCancel:
                 return
             mods_scanned += 1
-            self.signals.progress.emit(mods_scanned)  # update progress
+            # the progress dialog pumps the event loop on every update, so cap it at ~20Hz
+            now = time.monotonic()
+            if now >= next_progress_time or mods_scanned == len(self.active_mod_list):
+                self.signals.progress.emit(mods_scanned)  # update progress
+                next_progress_time = now + 0.05
             log_out += f"Scanning: {mod_name}\n"
-            if modlist.state(mod_name) & mobase.ModState.ACTIVE:
-                if "Merged ARC" not in mod_name:
-                    for dirpath, dirnames, filenames in os.walk(mod_directory + os.path.sep + mod_name):
-                        # check for extracted arc folders
-                        for folder in dirnames:
-                            arc_folder = dirpath + os.path.sep + folder
-                            relative_path = os.path.relpath(arc_folder, mod_directory).split(os.path.sep, 1)[1]
-                            # check for matching game file or arc.txt
-                            #  (fix for gog to steam merge)
-                            if os.path.isfile(os.path.join(game_directory, relative_path + ".arc")) or os.path.isfile(os.path.join(mod_directory, mod_name, relative_path + ".arc.txt", )):
-                                if bool(self._organizer.pluginSetting(ARCMerge.main_tool_name(), "verbose-log")):
-                                    log_out += f"ARC Folder: {relative_path}\n"
-                                if (mod_name not in ARCMerge.arc_folders_current_build_dict[relative_path]):
-                                    ARCMerge.arc_folders_current_build_dict[relative_path].append(mod_name)
+            # process_mods only passes active mods and never the merge mod itself
+            mod_root = os.path.join(mod_directory, mod_name)
+            # folders inside an ARC folder, mapped to that ARC's fingerprint and the
+            # length of its path prefix. the walk lists parents before their children
+            arc_owner_dict = {}
+            for relative_dirpath, dirpath, folder_list, file_list in walk_relative(
+                    mod_root, ignored_folders=self.IGNORED_FOLDERS):
+                owner = arc_owner_dict.pop(relative_dirpath, None)
+                if owner is not None:
+                    fingerprint, prefix_length = owner
+                    for file_entry in file_list:
+                        file_stat = file_entry.stat()
+                        fingerprint[os.path.join(relative_dirpath, file_entry.name)[prefix_length:]] = [
+                            file_stat.st_size, file_stat.st_mtime_ns]
+                if not folder_list:
+                    continue
+                # the directory listing already has the .arc.txt files, no isfile needed
+                file_entry_dict = {entry.name: entry for entry in file_list}
+                # check for extracted arc folders
+                for folder in folder_list:
+                    relative_path = os.path.join(relative_dirpath, folder)
+                    arc_txt_entry = file_entry_dict.get(folder + ".arc.txt")
+                    # check for arc.txt or matching game file
+                    #  (fix for gog to steam merge)
+                    if arc_txt_entry is not None or os.path.normcase(relative_path) in game_arc_set:
+                        fingerprint = ARCMerge.arc_folders_current_fingerprint_dict[relative_path][mod_name] = {}
+                        # the .arc.txt is merged as well
+                        if arc_txt_entry is not None:
+                            file_stat = arc_txt_entry.stat()
+                            fingerprint[".arc.txt"] = [file_stat.st_size, file_stat.st_mtime_ns]
+                        arc_owner_dict[relative_path] = (fingerprint, len(relative_path) + 1)
+                        if verbose_log:
+                            log_out += f"ARC Folder: {relative_path}\n"
+                        merge_list = ARCMerge.arc_folders_current_build_dict[relative_path]
+                        # mods are scanned in order, a repeat can only be the last entry
+                        if not merge_list or merge_list[-1] != mod_name:
+                            merge_list.append(mod_name)
+                    elif owner is not None:
+                        arc_owner_dict[relative_path] = owner
 
         self.signals.result.emit(log_out)  # Return log
         self.signals.finished.emit()  # Done
         return
 
 
+class CleanupThreadWorkerSignals(QObject):
+    finished = pyqtSignal()
+
+
 class CleanupThreadWorker(QRunnable):
-    def __init__(self, organizer, entry):
+    def __init__(self, organizer, mod_directory, entry):
         self._organizer = organizer
+        self.mod_directory = mod_directory
         self.entry = entry
+        self.signals = CleanupThreadWorkerSignals()
         super(CleanupThreadWorker, self).__init__()
 
     @pyqtSlot()
     def run(self):
-        mod_directory = self._organizer.modsPath()
+        mod_directory = self.mod_directory
         merge_mod = "Merged ARC - " + self._organizer.profileName()
         # clean merge
-        pathlib.Path(os.path.join(mod_directory, merge_mod, self.entry + ".arc.txt")).unlink(missing_ok=True)
-        pathlib.Path(os.path.join(mod_directory, merge_mod, self.entry + ".arc")).unlink(missing_ok=True)
-        if os.path.exists(os.path.join(mod_directory, merge_mod, self.entry)):
-            shutil.rmtree(os.path.join(mod_directory, merge_mod, self.entry))
+        merged_arc_folder = os.path.join(mod_directory, merge_mod, self.entry)
+        remove_file(merged_arc_folder + ".arc.txt")
+        remove_file(merged_arc_folder + ".arc")
+        if os.path.exists(merged_arc_folder):
+            shutil.rmtree(merged_arc_folder)
+        self.signals.finished.emit()  # Done
         return
 
 
@@ -399,9 +536,12 @@ class MergeThreadWorkerSignals(QObject):
 
 
 class MergeThreadWorker(QRunnable):
-    def __init__(self, organizer, managed_game, mods_to_merge, arc_folder_path):
+    def __init__(self, organizer, managed_game, executable, game_directory, mod_directory, mods_to_merge, arc_folder_path):
         self._organizer = organizer
         self._managed_game = managed_game
+        self.executable = executable
+        self.game_directory = game_directory
+        self.mod_directory = mod_directory
         self.mods_to_merge = mods_to_merge
         self.arc_folder_path = arc_folder_path
         self.signals = MergeThreadWorkerSignals()
@@ -413,20 +553,16 @@ class MergeThreadWorker(QRunnable):
         if ARCMerge.threadCancel:
             log_out += "Merge cancelled\n"
             return
-        # default args are for dragon's dogma dark arisen
-        compress_args = "-c -pc -dd -texRE6 -silent -alwayscomp -tex -xfs -gmd -txt -v 7"
-        extract_args = "-x -pc -dd -texRE6 -silent -alwayscomp -txt -v 7"
-        # change args if needed 
-        match self._managed_game:
-            case "residentevil0biohazard0hdremaster":
-                compress_args = "-c -pc -re0 -texRE6 -silent -alwayscomp -tex -xfs -gmd -txt -v 7"
-                extract_args = "-x -pc --re0 -texRE6 -silent -alwayscomp -txt -v 7"
-            case "residentevilbiohazardhdremaster":
-                compress_args = "-c -pc -rehd -texRE6 -silent -alwayscomp -tex -xfs -gmd -txt -v 7"
-                extract_args = "-x -pc --rehd -texRE6 -silent -alwayscomp -txt -v 7"
-        executable = os.path.join(self._organizer.basePath(), "ARCtool.exe")
-        game_directory = self._organizer.managedGame().dataDirectory().absolutePath()
-        mod_directory = self._organizer.modsPath()
+        compress_args = GAME_COMPRESS_ARGS.get(self._managed_game, COMPRESS_ARGS)
+        extract_args = GAME_EXTRACT_ARGS.get(self._managed_game, EXTRACT_ARGS)
+        # only pipe ARCtool's output back when it is going to be logged
+        verbose_log = bool(self._organizer.pluginSetting(ARCMerge.main_tool_name(), "verbose-log"))
+        # ARCtool is only expected to read the folder it compresses, but nothing here proves
+        # that for the -tex/-xfs/-gmd conversions. copy the mod files unless the user opted in
+        link_files = bool(self._organizer.pluginSetting(ARCMerge.main_tool_name(), "link-merge-files"))
+        executable = self.executable
+        game_directory = self.game_directory
+        mod_directory = self.mod_directory
         arc_folder_parent = os.path.dirname(self.arc_folder_path)
         merge_mod = "Merged ARC - " + self._organizer.profileName()
         # copy vanilla arc to merge folder, extract, then delete if not already done
@@ -434,12 +570,11 @@ class MergeThreadWorker(QRunnable):
         if not os.path.isdir(extracted_arc_folder):
             log_out += f'Extracting vanilla ARC: {self.arc_folder_path + ".arc"}\n'
             if os.path.isfile(os.path.join(game_directory, self.arc_folder_path + ".arc")):
-                pathlib.Path(os.path.join(mod_directory, merge_mod, arc_folder_parent, "")).mkdir(parents=True, exist_ok=True)
-                shutil.copy(os.path.join(game_directory, self.arc_folder_path + ".arc"), os.path.join(mod_directory, merge_mod, arc_folder_parent, ""), )
+                os.makedirs(os.path.join(mod_directory, merge_mod, arc_folder_parent), exist_ok=True)
                 arc_fullpath = extracted_arc_folder + ".arc"
-                command = f'"{executable}" {extract_args} "{arc_fullpath}"'
-                output = os.popen(command).read()
-                if bool(self._organizer.pluginSetting(ARCMerge.main_tool_name(), "verbose-log")):
+                stage_file(os.path.join(game_directory, self.arc_folder_path + ".arc"), arc_fullpath)
+                output = run_arctool(executable, extract_args, arc_fullpath, verbose_log)
+                if verbose_log:
                     log_out += "\n------ start arctool vanilla extract output ------\n"
                     log_out += output + "------ end output ------\n"
                 # remove .arc file
@@ -447,23 +582,31 @@ class MergeThreadWorker(QRunnable):
         # copy mod files to merge folder
         for mod_name in self.mods_to_merge:
             child_mod_arc_path = os.path.join(mod_directory, mod_name, self.arc_folder_path)
-            if pathlib.Path(child_mod_arc_path).exists():
+            # not every mod has both, let the copies fail instead of checking first
+            try:
+                # stage_file drops an earlier mod's file first so a link is never written through
+                shutil.copytree(
+                    child_mod_arc_path, os.path.join(mod_directory, merge_mod, self.arc_folder_path, ""), dirs_exist_ok=True,
+                    copy_function=lambda source, destination: stage_file(source, destination, link_files), )
                 log_out += f"Merging mod: {mod_name}\n"
-                shutil.copytree(child_mod_arc_path, os.path.join(mod_directory, merge_mod, self.arc_folder_path, ""), dirs_exist_ok=True, )
-            if os.path.isfile(child_mod_arc_path + ".arc.txt"):
+            except FileNotFoundError:
+                pass
+            try:
+                # the .arc.txt is deleted after compressing, it follows the same setting
+                stage_file(child_mod_arc_path + ".arc.txt", extracted_arc_folder + ".arc.txt", link_files)
                 log_out += f"Copying {mod_name} {self.arc_folder_path}.arc.txt\n"
-                shutil.copy(child_mod_arc_path + ".arc.txt", os.path.join(mod_directory, merge_mod, arc_folder_parent, ), )
+            except FileNotFoundError:
+                pass
         # compress
         arc_fullpath = os.path.join(mod_directory, merge_mod, self.arc_folder_path)
-        command = f'"{executable}" {compress_args} "{arc_fullpath}"'
-        output = os.popen(command).read()
-        if bool(self._organizer.pluginSetting(ARCMerge.main_tool_name(), "verbose-log")):
+        output = run_arctool(executable, compress_args, arc_fullpath, verbose_log)
+        if verbose_log:
             log_out += "------ start arctool merge output ------\n"
             log_out += output + "------ end output ------\n"
         # remove folders and txt
         log_out += "Removing temp files\n"
         shutil.rmtree(arc_fullpath)
-        pathlib.Path(arc_fullpath + ".arc.txt").unlink(missing_ok=True)
+        remove_file(arc_fullpath + ".arc.txt")
         # finished
         log_out += "ARC merge complete"
         self.signals.result.emit(log_out)  # Return logs
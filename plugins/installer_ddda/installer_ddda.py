@@ -1,11 +1,11 @@
 import re
 import os
 import csv
+import string
 
 import mobase
 
-from pathlib import Path
-from typing import Dict, List, Optional, Sequence, Union, cast
+from typing import Union, cast
 
 from PyQt6.QtCore import qInfo
 from PyQt6.QtWidgets import QApplication
@@ -76,9 +76,13 @@ class dddaInstaller(mobase.IPluginInstallerSimple):
         return False
 
     fixable_structure = False
-    RE_BODYFILE = re.compile(r"[fm]_[aiw]_\w+.arc")
-    RE_DL1_BODYFILE = re.compile(r"[fm]_a_\w+820\d.arc")
-    RE_HEXEXTENSION = re.compile(r"[\.0-9a-fA-F]{8}")
+    debug_enabled = False
+    RE_BODYFILE = re.compile(r"[fm]_[aiw]_\w+\.arc")
+    RE_DL1_BODYFILE = re.compile(r"[fm]_a_\w+820\d\.arc")
+    # f_a_elf0001.arc splits to ["f", "a_elf", ...], index 1 is the equipment folder
+    RE_BODYFILE_SPLIT = re.compile(r"_(?=._)|[0-9]")
+    # strips hex digits, so a hex string translates to ""
+    HEX_DIGIT_TABLE = str.maketrans("", "", string.hexdigits)
     VALID_ROOT_FOLDERS = ["rom", "movie", "sound"]
     VALID_CHILD_FOLDERS = [
         "dl1",
@@ -111,60 +115,68 @@ class dddaInstaller(mobase.IPluginInstallerSimple):
         "Initialize",
         "title",
     ]
-    VALID_FILE_EXTENSIONS = [
+    # only ever tested against plain strings, so sets give O(1) lookups
+    VALID_FILE_EXTENSIONS = {
         ".arc",
         ".pck",
         ".wmv",
         ".sngw",
-    ]
-    NO_CHILDFOLDERS = ["a_acc", "i_body", "w_leg"]
+    }
+    NO_CHILDFOLDERS = {"a_acc", "i_body", "w_leg"}
+    # item, sound, and game manual files keep their hex extensions
+    TEX_FOLDER_EXCLUSIONS = ("sound", "ingamemanual", "MatAnim_Burn", "item")
     CopyList: list[tuple[mobase.FileTreeEntry, str]] = []
     MoveList: list[tuple[mobase.FileTreeEntry, str]] = []
     DeleteList: list[mobase.FileTreeEntry] = []
 
     def checkFiletreeEntry(self, path: str, entry: mobase.FileTreeEntry) -> mobase.IFileTree.WalkReturn:
         # we check for valid game files within a valid root folder
-        path_root = path.split(os.sep)[0]
-        entry_name, entry_extension = os.path.splitext(entry.name())
+        path_root = path.partition(os.sep)[0]
+        entry_filename = entry.name()
+        entry_name, entry_extension = os.path.splitext(entry_filename)
 
         if entry.isDir():
             parent = entry.parent()
             if path_root not in self.VALID_ROOT_FOLDERS:
                 if (parent in self.VALID_ROOT_FOLDERS and entry in self.VALID_CHILD_FOLDERS):
-                    if bool(self._organizer.pluginSetting(self.name(), "debug")):
+                    if self.debug_enabled:
                         qInfo(f"Adding child to move list: {path} {entry.name()}")
                     self.MoveList.append((entry, "rom" + os.sep))
                     self.fixable_structure = True
                     return mobase.IFileTree.WalkReturn.SKIP
         else:
             if path_root in self.VALID_ROOT_FOLDERS:
-                name, ext = os.path.splitext(entry.name())
-                if ext in self.VALID_FILE_EXTENSIONS:
+                if entry_extension in self.VALID_FILE_EXTENSIONS:
                     self.valid_structure = True
-                    if bool(self._organizer.pluginSetting(self.name(), "debug")):
+                    if self.debug_enabled:
                         qInfo("checkFiletreeEntry valid")
                     return mobase.IFileTree.WalkReturn.STOP
-            is_body_file = self.RE_BODYFILE.match(entry.name())
+            # body files are all .arc, skip the regex for everything else
+            is_body_file = entry_extension == ".arc" and self.RE_BODYFILE.fullmatch(entry_filename)
             if is_body_file:
                 self.fixable_structure = True
-                parent_folder = str(entry.name())[0]
-                grandparent_folder = re.split(r"_(?=._)|[0-9]", str(entry.name()))[1]
-                if bool(self._organizer.pluginSetting(self.name(), "debug")):
-                    qInfo(f"Adding to move list: {path + entry.name()}")
+                parent_folder = entry_filename[0]
+                grandparent_folder = self.RE_BODYFILE_SPLIT.split(entry_filename)[1]
+                if self.debug_enabled:
+                    qInfo(f"Adding to move list: {path + entry_filename}")
                 if grandparent_folder in self.NO_CHILDFOLDERS:
                     target_path = os.path.join("/rom/eq/", grandparent_folder)
                     self.MoveList.append((entry, os.path.normpath(target_path)))
                 else:
                     target_path = os.path.join("/rom/eq/", grandparent_folder, parent_folder)
                     self.MoveList.append((entry, os.path.normpath(target_path)))
-            has_hex_file_extension = self.RE_HEXEXTENSION.match(entry_extension)
             # ignore item, sound, and game manual files with hex extenstions
-            folder_exlusions = ["sound", "ingamemanual", "MatAnim_Burn", "item"]
-            if has_hex_file_extension and not any(x in path for x in folder_exlusions):
-                qInfo(f"Invalid TEX file found: {path + entry.name()}")
+            if self.is_hex_extension(entry_extension) and not any(x in path for x in self.TEX_FOLDER_EXCLUSIONS):
+                qInfo(f"Invalid TEX file found: {path + entry_filename}")
                 self.MoveList.append((entry, path + entry_name + ".tex"))
         return mobase.IFileTree.WalkReturn.CONTINUE
 
+    @classmethod
+    def is_hex_extension(cls, extension: str) -> bool:
+        # ARCtool names unknown file types after their 8 digit hex type hash
+        return (len(extension) == 9 and extension[0] == "."
+                and not extension[1:].translate(cls.HEX_DIGIT_TABLE))
+
     def install(self, name: mobase.GuessedString, filetree: mobase.IFileTree, version: str, nexus_id: int,) -> Union[mobase.InstallResult, mobase.IFileTree]:
         """
         Perform the actual installation.
@@ -190,13 +202,15 @@ class dddaInstaller(mobase.IPluginInstallerSimple):
         self.DeleteList.clear()
         self.fixable_structure = False
         self.valid_structure = False
+        # read once, checkFiletreeEntry runs for every entry in the archive
+        self.debug_enabled = bool(self._organizer.pluginSetting(self.name(), "debug"))
 
         #find mod name variant with nexus ID as it should be unique (fingers crossed)
         filter_object = filter(lambda a: str(nexus_id) in a, name.variants())
         if filter_object:            
             mod_identifier = list(filter_object)[0]
 
-        if bool(self._organizer.pluginSetting(self.name(), "debug")):
+        if self.debug_enabled:
             qInfo("File ID: " + mod_identifier)
 
         #check for install script
@@ -204,7 +218,7 @@ class dddaInstaller(mobase.IPluginInstallerSimple):
         if os.path.isfile(instruction_file) and self._organizer.pluginSetting(self.name(), "use_instruction_file"):
             # can we fix it, yes we can!
             self.fixable_structure = True
-            if bool(self._organizer.pluginSetting(self.name(), "debug")):
+            if self.debug_enabled:
                 qInfo("Found install instructions")
             #load delete, copy, and move lists from csv
             with open(instruction_file, 'r', newline='') as csvfile:
@@ -233,7 +247,7 @@ class dddaInstaller(mobase.IPluginInstallerSimple):
         if self.fixable_structure:
             if not self.CopyList and not self.MoveList and not self.DeleteList:
                 # if lists are empty, we can't fix it after all
-                if bool(self._organizer.pluginSetting(self.name(), "debug")):
+                if self.debug_enabled:
                     qInfo("Nothing to do. Exiting...")
                 return mobase.InstallResult.NOT_ATTEMPTED
             if self.CopyList:
@@ -241,38 +255,38 @@ class dddaInstaller(mobase.IPluginInstallerSimple):
                     entry_path = os.path.split(path)
                     # if we have a file...
                     if entry_path[1]:
-                        if bool(self._organizer.pluginSetting(self.name(), "debug")):
+                        if self.debug_enabled:
                             qInfo(f"Rename: {entry.name()} : {path}")
                         filetree.copy(entry, path)                        
                     else:
-                        if bool(self._organizer.pluginSetting(self.name(), "debug")):
+                        if self.debug_enabled:
                             qInfo(f"Copy: {entry.name()} : {path}")
                         filetree.addDirectory(path).copy(entry)
             if self.MoveList:
                 for entry, path in reversed(self.MoveList):
                     entry_path = filetree.pathTo(entry, os.sep)
                     path_root = entry_path.split(os.sep)[0]
-                    if bool(self._organizer.pluginSetting(self.name(), "debug")):
+                    if self.debug_enabled:
                         qInfo(f"Move: {entry.name()} : {path}")
                     filetree.move(entry, path + os.sep, policy=mobase.IFileTree.MERGE)
                     # TODO make sure folder is empty?
                     filetree.remove(path_root)  # remove empty branch
             if self.DeleteList:
                 for entry in reversed(self.DeleteList):
-                    if bool(self._organizer.pluginSetting(self.name(), "debug")):
+                    if self.debug_enabled:
                         qInfo(f"Delete: {entry.name()}")
                     filetree.move(entry, "/delete/" + entry.name(), policy=mobase.IFileTree.MERGE)
             # remove invalid root folder
             filetree.remove("delete")
             if bool(self._organizer.pluginSetting(self.name(), "manual_mode")):
-                if bool(self._organizer.pluginSetting(self.name(), "debug")):
+                if self.debug_enabled:
                     qInfo(f"Manual mode requested")
                 return (mobase.InstallResult.MANUAL_REQUESTED, filetree, version, nexus_id)
-            if bool(self._organizer.pluginSetting(self.name(), "debug")):
+            if self.debug_enabled:
                 qInfo(f"Finished sorting")
             return (mobase.InstallResult.SUCCESS, filetree, version, nexus_id)
             
-        if bool(self._organizer.pluginSetting(self.name(), "debug")):
+        if self.debug_enabled:
             qInfo("Not attempting install")
 
         return mobase.InstallResult.NOT_ATTEMPTED
\ No newline at end of file